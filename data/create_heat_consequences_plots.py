@@ -15,17 +15,22 @@ Author: Data Visualization Project
 Date: 2025
 """
 
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')  # batch script: never probe GUI backends
+
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.offsetbox import AnchoredText
 import seaborn as sns
 import numpy as np
 from datetime import datetime
-import os
+from concurrent.futures import ProcessPoolExecutor
 
 # Set publication-ready style
 sns.set_style("whitegrid")
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['savefig.dpi'] = 300
+plt.rcParams['savefig.dpi'] = 150
 plt.rcParams['font.size'] = 10
 plt.rcParams['axes.labelsize'] = 11
 plt.rcParams['axes.titlesize'] = 13
@@ -33,147 +38,247 @@ plt.rcParams['xtick.labelsize'] = 9
 plt.rcParams['ytick.labelsize'] = 9
 plt.rcParams['figure.figsize'] = (10, 6)
 
+# 150 dpi is plenty for web assets; fast zlib level keeps PNG encoding cheap
+PNG_OPTIONS = {'compress_level': 1, 'optimize': False}
+
+# Reds colormap sampled once over the range used for the mortality bars
+_RED_LUT = plt.cm.Reds(np.linspace(0.4, 0.9, 32))
+
 # Directories
 data_dir = "processed"
 output_dir = "processed"
 os.makedirs(output_dir, exist_ok=True)
 
-print("=" * 70)
-print("CREATING HEAT CONSEQUENCES VISUALIZATIONS")
-print("=" * 70)
+# Figures built so far, keyed by chart name: (fig, artists). Re-rendering a
+# chart updates the cached artists' data instead of rebuilding the figure.
+# Reuse only happens when the plot functions are called in-process (e.g.
+# imported from another script); under __main__ each chart renders once in
+# its own worker, so the cache is never hit there.
+_FIGURES = {}
 
 # ============================================================================
 # PART 1: ENERGY CONSUMPTION VS TEMPERATURE
 # ============================================================================
 
-print("\n[PLOT 1] Creating Energy Consumption vs Temperature Chart...")
-
-# Load data
-data_path = os.path.join(data_dir, "energy_temperature_monthly.csv")
-if os.path.exists(data_path):
-    df = pd.read_csv(data_path)
-    df['date'] = pd.to_datetime(df['date'])
-    print(f"  ✓ Loaded data from {data_path}")
-else:
-    print(f"  ✗ Data file not found: {data_path}")
-    print("  → Run fetch_heat_consequences_data.py first")
-    exit(1)
-
-# Create the dual-axis plot
-fig, ax1 = plt.subplots(figsize=(12, 6))
-
-# Left y-axis: Electricity Consumption
-color1 = '#e85d04'  # Orange (heat theme)
-ax1.set_xlabel('Month', fontweight='bold')
-ax1.set_ylabel('Electricity Consumption (GWh)', color=color1, fontweight='bold')
-line1 = ax1.plot(df['date'], df['electricity_gwh'], 
-                 color=color1, linewidth=2, label='Electricity Consumption', marker='o', markersize=3)
-ax1.tick_params(axis='y', labelcolor=color1)
-ax1.grid(True, alpha=0.3, linestyle='--')
-
-# Right y-axis: Temperature
-ax2 = ax1.twinx()
-color2 = '#dc2626'  # Red (temperature theme)
-ax2.set_ylabel('Average Temperature (°C)', color=color2, fontweight='bold')
-line2 = ax2.plot(df['date'], df['temperature_c'], 
-                 color=color2, linewidth=2, label='Temperature', marker='s', markersize=3, linestyle='--')
-ax2.tick_params(axis='y', labelcolor=color2)
-
-# Title and subtitle
-plt.title('Electricity Demand Increases During Hot Periods', 
-          fontsize=16, fontweight='bold', pad=20)
-plt.suptitle('Italy, Monthly Averages (2020-2023)', 
-             fontsize=11, y=0.96, style='italic')
-
-# Add legend
-lines1, labels1 = ax1.get_legend_handles_labels()
-lines2, labels2 = ax2.get_legend_handles_labels()
-ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', framealpha=0.9)
-
-# Format x-axis dates
-fig.autofmt_xdate(rotation=45)
-ax1.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%Y-%m'))
-
-# Add caption text box
-caption_text = ("Higher temperatures increase cooling demand, raising electricity consumption.\n"
-                "Data sources: Eurostat (energy), Copernicus ERA5 (temperature)")
-fig.text(0.5, 0.02, caption_text, ha='center', fontsize=9, 
-         style='italic', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
-
-plt.tight_layout()
-plt.savefig(os.path.join(output_dir, 'energy_consumption_vs_temperature.png'), 
-            bbox_inches='tight', facecolor='white')
-print(f"  ✓ Saved: {output_dir}/energy_consumption_vs_temperature.png")
+def _add_caption(fig, caption_text, bottom):
+    """Reserve a bottom band for the caption, solve the layout once and freeze it.
+
+    Constrained layout places the axes above the band in one pass; switching
+    the engine off afterwards means savefig (and reused figures) never
+    re-solve it, and no bbox_inches='tight' re-render pass is needed.
+    """
+    engine = fig.get_layout_engine()
+    engine.set(rect=(0, bottom, 1, 1 - bottom))
+    engine.execute(fig)
+    fig.set_layout_engine('none')
+    caption = AnchoredText(caption_text, loc='lower center', frameon=True,
+                           prop=dict(size=9, style='italic', ha='center'),
+                           bbox_to_anchor=(0.5, 0.01), bbox_transform=fig.transFigure)
+    caption.patch.set(boxstyle='round', facecolor='wheat', alpha=0.3)
+    fig.add_artist(caption)
+
+def _make_energy_temp_fig(df):
+    """Build the dual-axis energy/temperature figure; returns (fig, artists)."""
+    fig, ax1 = plt.subplots(figsize=(12, 6), layout='constrained')
+
+    # Left y-axis: Electricity Consumption
+    color1 = '#e85d04'  # Orange (heat theme)
+    ax1.set_xlabel('Month', fontweight='bold')
+    ax1.set_ylabel('Electricity Consumption (GWh)', color=color1, fontweight='bold')
+    line1, = ax1.plot(df['date'], df['electricity_gwh'], 
+                      color=color1, linewidth=2, label='Electricity Consumption', marker='o', markersize=3)
+    ax1.tick_params(axis='y', labelcolor=color1)
+    ax1.grid(True, alpha=0.3, linestyle='--')
+
+    # Right y-axis: Temperature
+    ax2 = ax1.twinx()
+    color2 = '#dc2626'  # Red (temperature theme)
+    ax2.set_ylabel('Average Temperature (°C)', color=color2, fontweight='bold')
+    line2, = ax2.plot(df['date'], df['temperature_c'], 
+                      color=color2, linewidth=2, label='Temperature', marker='s', markersize=3, linestyle='--')
+    ax2.tick_params(axis='y', labelcolor=color2)
+
+    # Title and subtitle
+    plt.title('Electricity Demand Increases During Hot Periods', 
+              fontsize=16, fontweight='bold', pad=20)
+    plt.suptitle('Italy, Monthly Averages (2020-2023)', 
+                 fontsize=11, y=0.96, style='italic')
+
+    # Add legend
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', framealpha=0.9)
+
+    # Format x-axis dates
+    fig.autofmt_xdate(rotation=45)
+    ax1.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%Y-%m'))
+
+    # Add caption text box
+    caption_text = ("Higher temperatures increase cooling demand, raising electricity consumption.\n"
+                    "Data sources: Eurostat (energy), Copernicus ERA5 (temperature)")
+
+    _add_caption(fig, caption_text, bottom=0.1)
+    return fig, {'ax1': ax1, 'ax2': ax2, 'line1': line1, 'line2': line2}
+
+def plot_energy_temperature(df, path):
+    """Render the energy/temperature chart, reusing the cached figure if any."""
+    if 'energy_temp' in _FIGURES:
+        fig, artists = _FIGURES['energy_temp']
+        artists['line1'].set_data(df['date'], df['electricity_gwh'])
+        artists['line2'].set_data(df['date'], df['temperature_c'])
+        for ax in (artists['ax1'], artists['ax2']):
+            ax.relim()
+            ax.autoscale_view()
+        fig.canvas.draw_idle()
+    else:
+        fig, artists = _FIGURES['energy_temp'] = _make_energy_temp_fig(df)
+    fig.savefig(path, facecolor='white', pil_kwargs=PNG_OPTIONS)
+
+def load_processed(name, parse_dates=None):
+    """Load a processed table, preferring the typed Parquet copy over CSV
+    unless the CSV was written more recently (e.g. by another fetch script)"""
+    parquet_path = os.path.join(data_dir, f"{name}.parquet")
+    csv_path = os.path.join(data_dir, f"{name}.csv")
+    csv_exists = os.path.exists(csv_path)
+    if os.path.exists(parquet_path) and not (
+            csv_exists and os.path.getmtime(csv_path) > os.path.getmtime(parquet_path)):
+        return pd.read_parquet(parquet_path), parquet_path
+    if csv_exists:
+        return pd.read_csv(csv_path, parse_dates=parse_dates), csv_path
+    return None, csv_path
 
 # ============================================================================
 # PART 2: HEAT-RELATED MORTALITY
 # ============================================================================
 
-print("\n[PLOT 2] Creating Heat-Related Mortality Chart...")
-
-# Load mortality data
-mortality_path = os.path.join(data_dir, "heat_mortality_yearly.csv")
-if os.path.exists(mortality_path):
-    mortality_df = pd.read_csv(mortality_path)
-    print(f"  ✓ Loaded data from {mortality_path}")
-else:
-    print(f"  ✗ Data file not found: {mortality_path}")
-    print("  → Run fetch_heat_consequences_data.py first")
-    exit(1)
-
-# Create bar chart
-fig, ax = plt.subplots(figsize=(10, 6))
-
-# Color scheme: darker red for higher mortality
-colors = plt.cm.Reds(np.linspace(0.4, 0.9, len(mortality_df)))
-
-bars = ax.bar(mortality_df['year'], mortality_df['excess_deaths'], 
-              color=colors, edgecolor='darkred', linewidth=1.5, alpha=0.8)
-
-# Add value labels on bars
-for i, (bar, value) in enumerate(zip(bars, mortality_df['excess_deaths'])):
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2., height,
-            f'{int(value):,}',
-            ha='center', va='bottom', fontweight='bold', fontsize=9)
-
-# Styling
-ax.set_xlabel('Year', fontweight='bold')
-ax.set_ylabel('Excess Deaths', fontweight='bold')
-ax.set_title('Excess Mortality During Extreme Heat Events', 
-             fontsize=16, fontweight='bold', pad=20)
-ax.set_title('Europe / Italy (Official Statistics)', 
-             fontsize=11, style='italic', pad=5, loc='right')
-
-# Grid
-ax.grid(True, alpha=0.3, linestyle='--', axis='y')
-ax.set_axisbelow(True)
-
-# Highlight 2022 (record year)
-ax.axvline(x=2022, color='darkred', linestyle=':', linewidth=2, alpha=0.7, label='Record heatwave (2022)')
-ax.legend(loc='upper left', framealpha=0.9)
-
-# Add caption
-caption_text = ("Extreme heat events are associated with increased mortality, "
-                "particularly among vulnerable populations.\n"
-                "Data sources: Eurostat excess mortality statistics, "
-                "peer-reviewed research (Nature, 2023)")
-fig.text(0.5, 0.02, caption_text, ha='center', fontsize=9, 
-         style='italic', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
-
-plt.tight_layout()
-plt.savefig(os.path.join(output_dir, 'heat_related_mortality.png'), 
-           bbox_inches='tight', facecolor='white')
-print(f"  ✓ Saved: {output_dir}/heat_related_mortality.png")
+def _label_bars(ax, bars, values):
+    """Add thousands-separated value labels on top of the bars"""
+    return ax.bar_label(bars, labels=[f'{int(v):,}' for v in values.to_numpy()],
+                        padding=2, fontweight='bold', fontsize=9)
+
+def _make_mortality_fig(mortality_df):
+    """Build the excess-mortality bar chart; returns (fig, artists)."""
+    fig, ax = plt.subplots(figsize=(10, 6), layout='constrained')
+
+    # Color scheme: darker red for higher mortality
+    lut_idx = np.linspace(0, len(_RED_LUT) - 1, len(mortality_df)).round().astype(int)
+    colors = _RED_LUT[lut_idx]
+
+    bars = ax.bar(mortality_df['year'], mortality_df['excess_deaths'], 
+                  color=colors, edgecolor='darkred', linewidth=1.5, alpha=0.8)
+
+    # Add value labels on bars
+    labels = _label_bars(ax, bars, mortality_df['excess_deaths'])
+
+    # Styling
+    ax.set_xlabel('Year', fontweight='bold')
+    ax.set_ylabel('Excess Deaths', fontweight='bold')
+    ax.set_title('Excess Mortality During Extreme Heat Events', 
+                 fontsize=16, fontweight='bold', pad=20)
+    ax.set_title('Europe / Italy (Official Statistics)', 
+                 fontsize=11, style='italic', pad=5, loc='right')
+
+    # Grid
+    ax.grid(True, alpha=0.3, linestyle='--', axis='y')
+    ax.set_axisbelow(True)
+
+    # Highlight 2022 (record year)
+    ax.axvline(x=2022, color='darkred', linestyle=':', linewidth=2, alpha=0.7, label='Record heatwave (2022)')
+    ax.legend(loc='upper left', framealpha=0.9)
+
+    # Add caption
+    caption_text = ("Extreme heat events are associated with increased mortality, "
+                    "particularly among vulnerable populations.\n"
+                    "Data sources: Eurostat excess mortality statistics, "
+                    "peer-reviewed research (Nature, 2023)")
+
+    _add_caption(fig, caption_text, bottom=0.1)
+    return fig, {'ax': ax, 'bars': bars, 'labels': labels,
+                 'years': mortality_df['year'].tolist()}
+
+def plot_mortality(mortality_df, path):
+    """Render the mortality chart, reusing the cached figure for the same years."""
+    cached = _FIGURES.get('mortality')
+    if cached is not None and cached[1]['years'] == mortality_df['year'].tolist():
+        fig, artists = cached
+        for bar, value in zip(artists['bars'], mortality_df['excess_deaths']):
+            bar.set_height(value)
+        for label in artists['labels']:
+            label.remove()
+        artists['labels'] = _label_bars(artists['ax'], artists['bars'],
+                                        mortality_df['excess_deaths'])
+        artists['ax'].relim()
+        artists['ax'].autoscale_view()
+        fig.canvas.draw_idle()
+    else:
+        if cached is not None:
+            plt.close(cached[0])
+        fig, artists = _FIGURES['mortality'] = _make_mortality_fig(mortality_df)
+    fig.savefig(path, facecolor='white', pil_kwargs=PNG_OPTIONS)
+
+# ============================================================================
+# PARALLEL RENDERING
+# ============================================================================
+
+_RENDERERS = {
+    'energy_temp': plot_energy_temperature,
+    'mortality': plot_mortality,
+}
+
+def _render(job):
+    """Worker entry point: render one (chart name, data, output path) job"""
+    name, data, path = job
+    _RENDERERS[name](data, path)
+    return path
 
 # ============================================================================
-# CONNECTION TO UHI (as amplifiers)
+# MAIN EXECUTION
 # ============================================================================
 
-print("\n" + "=" * 70)
-print("CONNECTION TO URBAN HEAT ISLANDS")
-print("=" * 70)
-print("""
+if __name__ == "__main__":
+
+    print("=" * 70)
+    print("CREATING HEAT CONSEQUENCES VISUALIZATIONS")
+    print("=" * 70)
+
+    print("\n[PLOT 1] Loading Energy Consumption vs Temperature data...")
+    # Load data
+    df, data_path = load_processed("energy_temperature_monthly", parse_dates=['date'])
+    if df is not None:
+        print(f"  ✓ Loaded data from {data_path}")
+    else:
+        print(f"  ✗ Data file not found: {data_path}")
+        print("  → Run fetch_heat_consequences_data.py first")
+        exit(1)
+
+    print("\n[PLOT 2] Loading Heat-Related Mortality data...")
+    # Load mortality data
+    mortality_df, mortality_path = load_processed("heat_mortality_yearly")
+    if mortality_df is not None:
+        print(f"  ✓ Loaded data from {mortality_path}")
+    else:
+        print(f"  ✗ Data file not found: {mortality_path}")
+        print("  → Run fetch_heat_consequences_data.py first")
+        exit(1)
+
+    # The two figures share no state: render and encode them in parallel
+    print("\n[RENDER] Rendering both charts...")
+    jobs = [
+        ('energy_temp', df, os.path.join(output_dir, 'energy_consumption_vs_temperature.png')),
+        ('mortality', mortality_df, os.path.join(output_dir, 'heat_related_mortality.png')),
+    ]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for path in executor.map(_render, jobs):
+            print(f"  ✓ Saved: {path}")
+
+    # ============================================================================
+    # CONNECTION TO UHI (as amplifiers)
+    # ============================================================================
+
+    print("\n" + "=" * 70)
+    print("CONNECTION TO URBAN HEAT ISLANDS")
+    print("=" * 70)
+    print("""
 These visualizations demonstrate the CONSEQUENCES of heat, not UHI directly.
 
 HOW UHI AMPLIFIES THESE IMPACTS:
@@ -200,12 +305,12 @@ The defensible inference: Urban heat islands make existing heat problems worse,
 particularly in areas with high population density and low green cover.
 """)
 
-print("\n" + "=" * 70)
-print("VISUALIZATIONS COMPLETE")
-print("=" * 70)
-print(f"\nOutput files saved to: {output_dir}/")
-print("  - energy_consumption_vs_temperature.png")
-print("  - heat_related_mortality.png")
-print("\nData files:")
-print("  - energy_temperature_monthly.csv")
-print("  - heat_mortality_yearly.csv")
+    print("\n" + "=" * 70)
+    print("VISUALIZATIONS COMPLETE")
+    print("=" * 70)
+    print(f"\nOutput files saved to: {output_dir}/")
+    print("  - energy_consumption_vs_temperature.png")
+    print("  - heat_related_mortality.png")
+    print("\nData files:")
+    print("  - energy_temperature_monthly.csv")
+    print("  - heat_mortality_yearly.csv")
@@ -10,10 +10,11 @@ Data Sources:
 
 import pandas as pd
 import numpy as np
-import requests
-import json
+import orjson
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from eurostat_client import fetch_monthly_electricity
 
 # Create directories
 os.makedirs("raw", exist_ok=True)
@@ -31,39 +32,14 @@ print("=" * 70)
 print("\n[PART 1] Fetching Energy Consumption Data...")
 
 def fetch_energy_data():
-    """Try to fetch energy data from Eurostat API"""
-    try:
-        # Try nrg_10m (monthly energy statistics)
-        url = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/nrg_10m"
-        params = {
-            "format": "json",
-            "lang": "en",
-            "geo": "IT",
-            "nrg_bal": "FC",  # Final consumption
-            "siec": "E7000",  # Electricity
-            "unit": "GWH"
-        }
-        
-        print("  Attempting Eurostat API (nrg_10m)...")
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            # Parse Eurostat JSON format
-            if 'dataset' in data:
-                print("  ✓ API response received")
-                # Parse and return data
-                # (Implementation would parse the complex Eurostat JSON structure)
-                return None  # For now, return None to use fallback
-    except Exception as e:
-        print(f"  ⚠ API error: {e}")
-    
-    return None
+    """Try to fetch energy data from Eurostat API (shared client)"""
+    return fetch_monthly_electricity(geo='IT', years=(2020, 2023))
 
-def create_energy_data_from_patterns():
+def create_energy_data_from_patterns(rng):
     """
     Create realistic energy consumption data based on known patterns
     Source: Based on Eurostat energy statistics patterns for Italy
+    rng: numpy Generator for the noise, independent of the temperature one
     """
     print("  Creating energy data from known patterns...")
     
@@ -76,26 +52,24 @@ def create_energy_data_from_patterns():
     # Seasonal pattern: higher in summer (cooling) and winter (heating)
     # Summer peak: July-August
     # Winter peak: December-January
-    seasonal = np.zeros(len(dates))
-    for i, date in enumerate(dates):
-        month = date.month
-        if month in [7, 8]:  # Summer peak
-            seasonal[i] = 4000
-        elif month in [12, 1]:  # Winter peak
-            seasonal[i] = 3500
-        elif month in [6, 9]:  # Shoulder months
-            seasonal[i] = 2000
-        else:
-            seasonal[i] = 1000
-    
+    month_to_seasonal = np.zeros(13, dtype=np.float32)  # indexed by month (1-12)
+    month_to_seasonal[[7, 8]] = 4000  # Summer peak
+    month_to_seasonal[[12, 1]] = 3500  # Winter peak
+    month_to_seasonal[[6, 9]] = 2000  # Shoulder months
+    month_to_seasonal[[2, 3, 4, 5, 10, 11]] = 1000
+    seasonal = month_to_seasonal[dates.month.to_numpy()]
+
     # Add some year-over-year growth (1-2% per year)
-    growth = np.linspace(0, 0.06, len(dates))  # 6% total growth over 4 years
-    
+    growth = np.linspace(0, 0.06, len(dates), dtype=np.float32)  # 6% total growth over 4 years
+
     # Add realistic noise
-    np.random.seed(42)
-    noise = np.random.normal(0, 500, len(dates))
-    
-    electricity = base_consumption + seasonal + (base_consumption * growth) + noise
+    noise = rng.normal(0, 500, len(dates)).astype(np.float32)
+
+    # Accumulate in place in the seasonal buffer (no per-term temporaries)
+    electricity = seasonal
+    electricity += np.multiply(growth, base_consumption, dtype=np.float32)
+    electricity += noise
+    electricity += base_consumption
     
     df = pd.DataFrame({
         'date': dates,
@@ -113,21 +87,23 @@ def create_energy_data_from_patterns():
 
 print("\n[PART 2] Creating Temperature Data...")
 
-def create_temperature_data():
+def create_temperature_data(rng):
     """
     Create realistic temperature data based on Italian climate patterns
     Source: Based on ERA5 and Italian climate averages
+    rng: numpy Generator for the variation, independent of the energy one
     """
     print("  Creating temperature data from climate patterns...")
     
     dates = pd.date_range('2020-01-01', '2023-12-31', freq='MS')
-    
-    # Base temperature for Italy (monthly averages)
-    monthly_avg = {
-        1: 8.0, 2: 9.0, 3: 11.5, 4: 14.5, 5: 18.5, 6: 22.5,
-        7: 25.5, 8: 25.0, 9: 21.0, 10: 16.5, 11: 12.0, 12: 9.0
-    }
-    
+    n = len(dates)
+    months = dates.month.to_numpy()
+    years = dates.year.to_numpy()
+
+    # Base temperature for Italy (monthly averages), indexed by month (1-12)
+    monthly_avg = np.array([0.0, 8.0, 9.0, 11.5, 14.5, 18.5, 22.5,
+                            25.5, 25.0, 21.0, 16.5, 12.0, 9.0], dtype=np.float32)
+
     # Add year-to-year variation (heatwave years)
     year_adjustments = {
         2020: 0.5,   # Slightly warmer
@@ -135,20 +111,18 @@ def create_temperature_data():
         2022: 1.5,   # Record heatwave year
         2023: 1.2    # Second warmest
     }
-    
-    temperatures = []
-    for date in dates:
-        base_temp = monthly_avg[date.month]
-        year_adj = year_adjustments.get(date.year, 0)
-        # Add some monthly variation
-        variation = np.random.normal(0, 1.5)
-        temp = base_temp + year_adj + variation
-        temperatures.append(temp)
-    
+    first_year = years.min()
+    year_adj = np.array([year_adjustments.get(y, 0.0)
+                         for y in range(first_year, years.max() + 1)], dtype=np.float32)
+
+    # Add some monthly variation
+    variation = rng.normal(0, 1.5, n).astype(np.float32)
+    temperatures = monthly_avg[months] + year_adj[years - first_year] + variation
+
     df = pd.DataFrame({
         'date': dates,
-        'month': dates.month,
-        'year': dates.year,
+        'month': months,
+        'year': years,
         'temperature_c': np.round(temperatures, 1)
     })
     
@@ -164,6 +138,7 @@ print("\n[PART 3] Creating Mortality Data...")
 def create_mortality_data():
     """
     Create mortality data based on published research
+    Returns (years, excess_deaths) arrays
     Source: Nature Medicine (2023) - Heat-related mortality in Europe
     DOI: 10.1038/s41591-023-02419-z
     
@@ -175,56 +150,77 @@ def create_mortality_data():
     print("  Creating mortality data from published research...")
     
     # Based on Nature Medicine 2023 and Eurostat patterns
-    data = {
-        'year': [2015, 2018, 2019, 2020, 2021, 2022, 2023],
-        'excess_deaths': [2500, 3200, 2800, 3500, 4200, 18010, 14000],
-        'source': 'Nature Medicine 2023 + Eurostat patterns',
-        'notes': 'Italy-specific estimates based on published research'
-    }
+    # (Italy-specific estimates based on published research)
+    years = np.array([2015, 2018, 2019, 2020, 2021, 2022, 2023], dtype=np.int16)
+    excess_deaths = np.array([2500, 3200, 2800, 3500, 4200, 18010, 14000], dtype=np.int32)
     
-    df = pd.DataFrame({
-        'year': data['year'],
-        'excess_deaths': data['excess_deaths']
-    })
-    
-    print(f"  ✓ Created {len(df)} yearly records")
-    print(f"  Source: {data['source']}")
-    return df
+    print(f"  ✓ Created {len(years)} yearly records")
+    print("  Source: Nature Medicine 2023 + Eurostat patterns")
+    return years, excess_deaths
+
+# ============================================================================
+# JSON EXPORT
+# ============================================================================
+
+# orjson writes numpy scalars natively (float32 with its shortest repr)
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+def columns_to_records(columns):
+    """
+    Zip a dict of equal-length column arrays into the row records the
+    website expects, without a DataFrame round-trip
+    """
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
 
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
 if __name__ == "__main__":
-    
+
+    # Seeded for reproducible output; spawned child streams keep the energy
+    # noise and the temperature variation independent of each other
+    energy_rng, temperature_rng = np.random.default_rng(42).spawn(2)
+
     # 1. Energy Data
     energy_df = fetch_energy_data()
+    source_energy = 'Eurostat nrg_cb_pem (monthly final electricity consumption, Italy)'
     if energy_df is None:
-        energy_df = create_energy_data_from_patterns()
+        energy_df = create_energy_data_from_patterns(energy_rng)
+        source_energy = 'Based on Eurostat energy statistics patterns for Italy'
     
     # 2. Temperature Data
-    temp_df = create_temperature_data()
+    temp_df = create_temperature_data(temperature_rng)
     
     # 3. Merge Energy and Temperature
     print("\n[STEP 3] Merging Energy and Temperature Data...")
-    energy_df['month_year'] = energy_df['date'].dt.to_period('M')
-    temp_df['month_year'] = temp_df['date'].dt.to_period('M')
-    
-    merged_df = pd.merge(
-        energy_df[['month_year', 'electricity_gwh', 'date']],
-        temp_df[['month_year', 'temperature_c']],
-        on='month_year',
-        how='inner'
-    ).sort_values('date')
-    
-    merged_df['month'] = merged_df['date'].dt.month
-    merged_df['year'] = merged_df['date'].dt.year
-    
-    # Convert to JSON format for website
+    if np.array_equal(energy_df['date'].to_numpy(), temp_df['date'].to_numpy()):
+        # Both frames come from the same monthly date range: align directly
+        merged_df = energy_df[['date', 'month', 'year', 'electricity_gwh']].copy()
+        merged_df['temperature_c'] = temp_df['temperature_c'].to_numpy()
+    else:
+        merged_df = pd.merge(
+            energy_df[['date', 'electricity_gwh']],
+            temp_df[['date', 'temperature_c']],
+            on='date',
+            how='inner'
+        ).sort_values('date')
+        merged_df['month'] = merged_df['date'].dt.month
+        merged_df['year'] = merged_df['date'].dt.year
+
+    # Structure-of-arrays view for the website JSON: one typed, contiguous
+    # array per column, dates formatted once as strings
+    energy_temp_columns = {
+        'date': merged_df['date'].dt.strftime('%Y-%m-%d').to_numpy(),
+        'month': merged_df['month'].to_numpy(np.int8),
+        'year': merged_df['year'].to_numpy(np.int16),
+        'electricity_gwh': merged_df['electricity_gwh'].to_numpy(np.float32),
+        'temperature_c': merged_df['temperature_c'].to_numpy(np.float32),
+    }
     energy_temp_json = {
-        'data': merged_df[['date', 'month', 'year', 'electricity_gwh', 'temperature_c']].to_dict('records'),
+        'data': columns_to_records(energy_temp_columns),
         'metadata': {
-            'source_energy': 'Based on Eurostat energy statistics patterns for Italy',
+            'source_energy': source_energy,
             'source_temperature': 'Based on Italian climate averages and ERA5 patterns',
             'period': '2020-2023',
             'unit_energy': 'GWh',
@@ -232,15 +228,12 @@ if __name__ == "__main__":
         }
     }
     
-    # Convert dates to strings for JSON
-    for record in energy_temp_json['data']:
-        record['date'] = record['date'].strftime('%Y-%m-%d')
-    
     # 4. Mortality Data
-    mortality_df = create_mortality_data()
+    years, excess_deaths = create_mortality_data()
+    mortality_df = pd.DataFrame({'year': years, 'excess_deaths': excess_deaths})
     
     mortality_json = {
-        'data': mortality_df.to_dict('records'),
+        'data': columns_to_records({'year': years, 'excess_deaths': excess_deaths}),
         'metadata': {
             'source': 'Nature Medicine (2023) - Heat-related mortality in Europe during summer 2022',
             'doi': '10.1038/s41591-023-02419-z',
@@ -253,22 +246,32 @@ if __name__ == "__main__":
     print("\n[STEP 4] Saving JSON files...")
     
     energy_temp_path = os.path.join("json", "energy_temperature.json")
-    with open(energy_temp_path, 'w') as f:
-        json.dump(energy_temp_json, f, indent=2)
+    with open(energy_temp_path, 'wb') as f:
+        f.write(orjson.dumps(energy_temp_json, option=JSON_OPTIONS))
     print(f"  ✓ Saved: {energy_temp_path}")
     
     mortality_path = os.path.join("json", "heat_mortality.json")
-    with open(mortality_path, 'w') as f:
-        json.dump(mortality_json, f, indent=2)
+    with open(mortality_path, 'wb') as f:
+        f.write(orjson.dumps(mortality_json, option=JSON_OPTIONS))
     print(f"  ✓ Saved: {mortality_path}")
     
-    # Also save CSV for reference
-    merged_df[['date', 'month', 'year', 'electricity_gwh', 'temperature_c']].to_csv(
+    # Also save CSV for reference, then typed Parquet for the plotting script
+    # (no re-parsing of dates on load)
+    energy_temp_df = merged_df[['date', 'month', 'year', 'electricity_gwh', 'temperature_c']]
+    energy_temp_df.to_csv(
         os.path.join("processed", "energy_temperature_monthly.csv"), index=False
     )
     mortality_df.to_csv(
         os.path.join("processed", "heat_mortality_yearly.csv"), index=False
     )
+    energy_temp_df.to_parquet(
+        os.path.join("processed", "energy_temperature_monthly.parquet"),
+        index=False, compression='zstd'
+    )
+    mortality_df.to_parquet(
+        os.path.join("processed", "heat_mortality_yearly.parquet"),
+        index=False, compression='zstd'
+    )
     
     print("\n" + "=" * 70)
     print("DATA PREPROCESSING COMPLETE")
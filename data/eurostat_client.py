@@ -0,0 +1,119 @@
+"""
+Shared Eurostat Client
+Urban Heat Islands Data Visualization Project
+
+Single place for the Eurostat REST calls used by the preprocessing scripts:
+one cached HTTP session (shared connection pool + on-disk cache) and one
+streaming JSON-stat parser.
+
+Source: https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/nrg_cb_pem
+Documentation: https://ec.europa.eu/eurostat/web/json-and-unicode-web-services
+"""
+
+import io
+import os
+from datetime import timedelta
+
+import ijson
+import numpy as np
+import pandas as pd
+import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+
+API_URL = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data"
+
+os.makedirs("raw", exist_ok=True)
+
+# On-disk HTTP cache: Eurostat monthly data changes rarely, so repeated runs
+# within a day (from any script) are served from SQLite instead of the network.
+# Shared by every data script that talks to Eurostat: import it, don't rebuild it
+SESSION = requests_cache.CachedSession(
+    os.path.join("raw", "eurostat_cache"), backend="sqlite", expire_after=timedelta(days=1)
+)
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+
+def _parse_json_stat(source):
+    """
+    Stream a JSON-stat document: only the time labels and the
+    (time index, value) pairs are kept, never the full dict
+    Returns (dates, values) with unparseable labels dropped
+    """
+    time_labels = {}
+    time_indices = []
+    values_list = []
+    for prefix, event, value in ijson.parse(source, use_float=True):
+        if event not in ('number', 'string'):
+            continue
+        parent, _, key = prefix.rpartition('.')
+        if parent == 'dataset.value':
+            # Key format: "0,0,0,0,0,0" (indices for each dimension)
+            time_indices.append(key.split(',')[0])
+            values_list.append(value)
+        elif parent == 'dataset.dimension.time.category.label':
+            time_labels[key] = value
+
+    # Parse time (format: "2020M01" or "2020-01") in one pass;
+    # unknown or malformed labels become NaT and are dropped
+    raw_labels = [time_labels.get(time_idx, '').replace('M', '-')
+                  for time_idx in time_indices]
+    dates = pd.to_datetime(raw_labels, format='%Y-%m', errors='coerce')
+    mask = dates.notna()
+    return dates[mask], np.asarray(values_list, dtype='float32')[mask]
+
+
+def fetch_monthly_electricity(geo='IT', years=(2020, 2023)):
+    """
+    Fetch monthly final electricity consumption (GWh) from Eurostat nrg_cb_pem
+    Returns a DataFrame with date, month, year, electricity_gwh, or None
+    """
+    try:
+        params = {
+            "format": "json",
+            "lang": "en",
+            "geo": geo,
+            "nrg_bal": "FC",  # Final consumption
+            "siec": "E7000",  # Electricity
+            "unit": "GWH",  # Gigawatt hours
+            "freq": "M"  # Monthly
+        }
+
+        print("  Attempting Eurostat REST API...")
+        response = SESSION.get(f"{API_URL}/nrg_cb_pem", params=params, timeout=30, stream=True)
+
+        if response.status_code == 200:
+            try:
+                # Cached responses are replayed from their stored body
+                if response.from_cache:
+                    source = io.BytesIO(response.content)
+                else:
+                    response.raw.decode_content = True
+                    source = response.raw
+
+                dates, values = _parse_json_stat(source)
+                if len(dates) > 0:
+                    df = pd.DataFrame({
+                        'date': dates,
+                        'month': dates.month,
+                        'year': dates.year,
+                        'electricity_gwh': values
+                    }).sort_values('date')
+                    df = df[df['year'].between(*years)]
+                    if len(df) > 0:
+                        print(f"  ✓ Successfully fetched {len(df)} monthly records from Eurostat API")
+                        return df
+            except Exception as e:
+                print(f"  ⚠ API parsing error: {e}")
+
+        print(f"  ✗ API returned status {response.status_code}")
+        return None
+
+    except requests.exceptions.RequestException as e:
+        print(f"  ✗ Network error: {e}")
+        return None
+    except Exception as e:
+        print(f"  ✗ Error: {e}")
+        return None
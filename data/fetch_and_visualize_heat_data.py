@@ -18,143 +18,81 @@ Author: Data Visualization Project
 Date: 2025
 """
 
+import os
+os.environ.setdefault('MPLBACKEND', 'Agg')  # batch script: never probe GUI backends
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-import requests
 import json
-import os
 from datetime import datetime
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 warnings.filterwarnings('ignore')
 
-# Create directories
-os.makedirs("raw", exist_ok=True)
-os.makedirs("processed", exist_ok=True)
+# Everything with side effects (directories, banners, the Eurostat HTTP
+# session, pyarrow) is set up from __main__ or lazily inside the functions
+# that need it: chart worker processes re-import this module under spawn
 
-# Set publication-ready style
-sns.set_style("whitegrid")
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['savefig.dpi'] = 300
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.labelsize'] = 11
-plt.rcParams['axes.titlesize'] = 13
-plt.rcParams['xtick.labelsize'] = 9
-plt.rcParams['ytick.labelsize'] = 9
-
-print("=" * 70)
-print("FETCHING REAL PUBLIC DATA AND CREATING VISUALIZATIONS")
-print("=" * 70)
+# 150 dpi is plenty for web assets; fast zlib level keeps PNG encoding cheap
+PNG_OPTIONS = {'compress_level': 1, 'optimize': False}
 
 # ============================================================================
 # PART 1: ENERGY CONSUMPTION DATA
 # ============================================================================
 
-print("\n[PART 1] Fetching Energy Consumption Data...")
-
 def fetch_eurostat_electricity_api():
     """
     Fetch monthly electricity consumption for Italy from Eurostat REST API
-    
-    Source: https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/nrg_cb_pem
-    Documentation: https://ec.europa.eu/eurostat/web/json-and-unicode-web-services
+    (shared client: see eurostat_client.py)
     """
-    try:
-        # Eurostat REST API endpoint
-        url = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/nrg_cb_pem"
-        
-        # Parameters for Italy, monthly electricity consumption
-        params = {
-            "format": "json",
-            "lang": "en",
-            "geo": "IT",  # Italy
-            "nrg_bal": "FC",  # Final consumption
-            "siec": "E7000",  # Electricity
-            "unit": "GWH",  # Gigawatt hours
-            "freq": "M"  # Monthly
-        }
-        
-        print("  Attempting Eurostat REST API...")
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            try:
-                data = response.json()
-                
-                # Eurostat JSON format structure
-                if 'dataset' in data:
-                    dataset = data['dataset']
-                    values = dataset.get('value', {})
-                    dimension = dataset.get('dimension', {})
-                    
-                    # Extract time labels
-                    time_dim = dimension.get('time', {})
-                    time_labels = time_dim.get('category', {}).get('label', {})
-                    
-                    # Build records
-                    records = []
-                    for key, value in values.items():
-                        # Key format: "0,0,0,0,0,0" (indices for each dimension)
-                        indices = [int(x) for x in key.split(',')]
-                        if len(indices) >= 1:
-                            time_idx = str(indices[0])
-                            time_label = time_labels.get(time_idx, '')
-                            
-                            if time_label:
-                                try:
-                                    # Parse time (format: "2020M01" or "2020-01")
-                                    if 'M' in time_label:
-                                        date = pd.to_datetime(time_label.replace('M', '-'))
-                                    else:
-                                        date = pd.to_datetime(time_label)
-                                    
-                                    records.append({
-                                        'date': date,
-                                        'month': date.month,
-                                        'year': date.year,
-                                        'electricity_gwh': float(value)
-                                    })
-                                except Exception as e:
-                                    continue
-                    
-                    if records:
-                        df = pd.DataFrame(records).sort_values('date')
-                        # Filter recent years (2020-2023)
-                        df = df[df['year'].between(2020, 2023)]
-                        if len(df) > 0:
-                            print(f"  ✓ Successfully fetched {len(df)} monthly records from Eurostat API")
-                            return df
-            except Exception as e:
-                print(f"  ⚠ API parsing error: {e}")
-        
-        print(f"  ✗ API returned status {response.status_code}")
-        return None
-        
-    except requests.exceptions.RequestException as e:
-        print(f"  ✗ Network error: {e}")
-        return None
-    except Exception as e:
-        print(f"  ✗ Error: {e}")
-        return None
-
-def load_electricity_from_csv():
-    """Load electricity data from manually downloaded CSV"""
+    from eurostat_client import fetch_monthly_electricity
+    return fetch_monthly_electricity(geo='IT', years=(2020, 2023))
+
+def load_electricity_from_csv(years=(2020, 2023), batch_size=None):
+    """
+    Load electricity data from manually downloaded CSV
+    The year filter is pushed down to Arrow, so rows outside `years` never
+    reach pandas; pass batch_size to bound scanner memory on large extracts
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    
     csv_path = os.path.join("raw", "eurostat_electricity_italy.csv")
     if os.path.exists(csv_path):
         print(f"  ✓ Loading from local CSV: {csv_path}")
         try:
-            df = pd.read_csv(csv_path)
-            # Handle different CSV formats
-            if 'date' in df.columns:
-                df['date'] = pd.to_datetime(df['date'])
-            elif 'TIME_PERIOD' in df.columns:
-                df['date'] = pd.to_datetime(df['TIME_PERIOD'])
-                df = df.rename(columns={'OBS_VALUE': 'electricity_gwh'})
+            # Parse dates and values in Arrow's multi-threaded reader
+            dataset = ds.dataset(csv_path, format=ds.CsvFileFormat(
+                convert_options=pv.ConvertOptions(
+                    column_types={
+                        'date': pa.timestamp('ns'),
+                        'TIME_PERIOD': pa.timestamp('ns'),
+                        'electricity_gwh': pa.float32(),
+                        'OBS_VALUE': pa.float32(),
+                    },
+                    timestamp_parsers=['%Y-%m', pv.ISO8601],
+                ),
+            ))
+            # Handle different CSV formats (own "date" layout or Eurostat SDMX)
+            if 'date' in dataset.schema.names:
+                date_col, value_col = 'date', 'electricity_gwh'
+            else:
+                date_col, value_col = 'TIME_PERIOD', 'OBS_VALUE'
+            year = pc.year(pc.field(date_col))
+            scan_kwargs = {'batch_size': batch_size} if batch_size else {}
+            table = dataset.to_table(
+                columns=[date_col, value_col],
+                filter=(year >= years[0]) & (year <= years[1]),
+                **scan_kwargs,
+            )
+            df = table.to_pandas().rename(
+                columns={date_col: 'date', value_col: 'electricity_gwh'}
+            )
             
             df['month'] = df['date'].dt.month
             df['year'] = df['date'].dt.year
-            df = df[df['year'].between(2020, 2023)]
             return df[['date', 'month', 'year', 'electricity_gwh']]
         except Exception as e:
             print(f"  ✗ Error reading CSV: {e}")
@@ -164,8 +102,6 @@ def load_electricity_from_csv():
 # PART 2: TEMPERATURE DATA
 # ============================================================================
 
-print("\n[PART 2] Fetching Temperature Data...")
-
 def load_temperature_from_csv():
     """Load temperature data from CSV file"""
     csv_path = os.path.join("raw", "italy_monthly_temperature.csv")
@@ -185,8 +121,6 @@ def load_temperature_from_csv():
 # PART 3: MORTALITY DATA
 # ============================================================================
 
-print("\n[PART 3] Fetching Heat-Related Mortality Data...")
-
 def fetch_mortality_from_published_research():
     """
     Load mortality data from published research
@@ -219,12 +153,199 @@ def fetch_mortality_from_published_research():
     print(f"  Source: {data['source']}")
     return df
 
+# ============================================================================
+# CSV OUTPUT
+# ============================================================================
+
+def write_csv(df, output_path):
+    """
+    Write a DataFrame with Arrow's multi-threaded CSV writer
+    Month timestamps are written as plain dates (YYYY-MM-DD), as pandas does
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.compute as pc
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, pc.cast(table[field.name], pa.date32()))
+    # Same layout as DataFrame.to_csv: bare header, quotes only where needed
+    pv.write_csv(table, output_path, write_options=pv.WriteOptions(
+        quoting_style='needed', quoting_header='none'))
+
+# ============================================================================
+# PART 4: VISUALIZATIONS
+# ============================================================================
+
+_style_configured = False
+
+def _configure_style():
+    """Apply the publication-ready style once, on first plot"""
+    global _style_configured
+    if _style_configured:
+        return
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.dpi'] = 100  # working canvas only; output resolution is savefig.dpi
+    plt.rcParams['savefig.dpi'] = 150
+    plt.rcParams['font.size'] = 10
+    plt.rcParams['axes.labelsize'] = 11
+    plt.rcParams['axes.titlesize'] = 13
+    plt.rcParams['xtick.labelsize'] = 9
+    plt.rcParams['ytick.labelsize'] = 9
+    _style_configured = True
+
+_figure = None
+
+def _shared_figure(figsize):
+    """
+    Return the process's single Figure, cleared and resized for the next plot
+    Reuse only happens when the plot functions are called in-process (e.g.
+    imported from another script); under __main__ each chart renders in its
+    own worker, which builds the figure once
+    """
+    global _figure
+    import matplotlib.pyplot as plt
+    if _figure is None:
+        # Constrained layout is solved once at draw time (twinx-aware); the
+        # bottom band stays free for the fig.text caption
+        _figure = plt.figure(figsize=figsize, layout='constrained')
+        _figure.get_layout_engine().set(rect=(0, 0.1, 1, 0.9))
+    else:
+        _figure.clear()
+        _figure.set_size_inches(figsize)
+    return _figure
+
+def plot_energy_temperature(merged_df, output_path):
+    """Dual-axis chart of monthly electricity consumption vs temperature"""
+    # Plotting libraries are imported lazily: fetch-only runs never load them
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    _configure_style()
+    
+    fig = _shared_figure((12, 6))
+    ax1 = fig.add_subplot()
+
+    # Left y-axis: Electricity
+    color1 = '#e85d04'
+    ax1.set_xlabel('Month', fontweight='bold')
+    ax1.set_ylabel('Electricity Consumption (GWh)', color=color1, fontweight='bold')
+    ax1.plot(merged_df['date'], merged_df['electricity_gwh'], 
+             color=color1, linewidth=2, label='Electricity Consumption', 
+             marker='o', markersize=3)
+    ax1.tick_params(axis='y', labelcolor=color1)
+    ax1.grid(True, alpha=0.3, linestyle='--')
+
+    # Right y-axis: Temperature
+    ax2 = ax1.twinx()
+    color2 = '#dc2626'
+    ax2.set_ylabel('Average Temperature (°C)', color=color2, fontweight='bold')
+    ax2.plot(merged_df['date'], merged_df['temperature_c'], 
+             color=color2, linewidth=2, label='Temperature', 
+             marker='s', markersize=3, linestyle='--')
+    ax2.tick_params(axis='y', labelcolor=color2)
+
+    # Title
+    plt.title('Electricity Demand Increases During Hot Periods', 
+              fontsize=16, fontweight='bold', pad=20)
+    plt.suptitle('Italy, Monthly Averages', 
+                 fontsize=11, y=0.96, style='italic')
+
+    # Legend
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', framealpha=0.9)
+
+    # Format dates
+    fig.autofmt_xdate(rotation=45)
+    ax1.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%Y-%m'))
+
+    # Caption
+    caption = ("Higher temperatures increase cooling demand, raising electricity consumption.\n"
+               "Data sources: Eurostat (energy), Copernicus ERA5 (temperature)")
+    fig.text(0.5, 0.02, caption, ha='center', fontsize=9, style='italic',
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
+
+    fig.savefig(output_path, bbox_inches='tight', facecolor='white',
+                pil_kwargs=PNG_OPTIONS)
+
+def plot_mortality(mortality_df, output_path):
+    """Bar chart of yearly heat-related excess mortality"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    _configure_style()
+    
+    fig = _shared_figure((10, 6))
+    ax = fig.add_subplot()
+
+    colors = plt.cm.Reds(np.linspace(0.4, 0.9, len(mortality_df)))
+    bars = ax.bar(mortality_df['year'], mortality_df['excess_deaths'], 
+                  color=colors, edgecolor='darkred', linewidth=1.5, alpha=0.8)
+
+    # Value labels (one call for the whole bar container)
+    ax.bar_label(bars, labels=[f'{int(v):,}' for v in mortality_df['excess_deaths']],
+                 padding=2, fontweight='bold', fontsize=9)
+
+    ax.set_xlabel('Year', fontweight='bold')
+    ax.set_ylabel('Excess Deaths', fontweight='bold')
+    ax.set_title('Excess Mortality During Extreme Heat Events', 
+                 fontsize=16, fontweight='bold', pad=20)
+    ax.set_title('Europe / Italy (Official Statistics)', 
+                 fontsize=11, style='italic', pad=5, loc='right')
+
+    ax.grid(True, alpha=0.3, linestyle='--', axis='y')
+    ax.set_axisbelow(True)
+
+    # Highlight 2022
+    ax.axvline(x=2022, color='darkred', linestyle=':', linewidth=2, 
+               alpha=0.7, label='Record heatwave (2022)')
+    ax.legend(loc='upper left', framealpha=0.9)
+
+    # Caption
+    caption = ("Extreme heat events are associated with increased mortality, "
+               "particularly among vulnerable populations.\n"
+               "Data sources: Eurostat excess mortality statistics, "
+               "peer-reviewed research (Nature Medicine, 2023)")
+    fig.text(0.5, 0.02, caption, ha='center', fontsize=9, style='italic',
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
+
+    fig.savefig(output_path, bbox_inches='tight', facecolor='white',
+                pil_kwargs=PNG_OPTIONS)
+
+# ============================================================================
+# PARALLEL RENDERING
+# ============================================================================
+
+_RENDERERS = {
+    'energy_temp': plot_energy_temperature,
+    'mortality': plot_mortality,
+}
+
+def _render(job):
+    """Worker entry point: render one (chart name, data, output path) job"""
+    name, data, path = job
+    _RENDERERS[name](data, path)
+    return path
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
 if __name__ == "__main__":
     
+    # Create directories
+    os.makedirs("raw", exist_ok=True)
+    os.makedirs("processed", exist_ok=True)
+    
+    print("=" * 70)
+    print("FETCHING REAL PUBLIC DATA AND CREATING VISUALIZATIONS")
+    print("=" * 70)
+    
     # 1. Fetch Energy Data
     print("\n" + "=" * 70)
     print("STEP 1: Energy Consumption")
@@ -283,16 +404,21 @@ if __name__ == "__main__":
             print("  ✗ Temperature data missing date column")
             exit(1)
     
-    # Align by month-year
-    energy_df['month_year'] = energy_df['date'].dt.to_period('M')
-    temp_df['month_year'] = temp_df['date'].dt.to_period('M')
+    # Align by month-year on an integer key (year*12 + month) rather than
+    # Period objects, so the join runs on pandas' int hashtable
+    energy_df['ym'] = energy_df['date'].dt.year.astype('int32') * 12 + energy_df['date'].dt.month.astype('int32')
+    temp_df['ym'] = temp_df['date'].dt.year.astype('int32') * 12 + temp_df['date'].dt.month.astype('int32')
     
+    # Project to the join key and payload first so the hash join only
+    # touches the columns it keeps; one record per month on each side
+    left = energy_df[['ym', 'electricity_gwh', 'date']]
+    right = temp_df[['ym', 'temperature_c']]
     merged_df = pd.merge(
-        energy_df[['month_year', 'electricity_gwh', 'date']],
-        temp_df[['month_year', 'temperature_c']],
-        on='month_year',
-        how='inner'
-    ).sort_values('date')
+        left, right,
+        on='ym',
+        how='inner',
+        validate='1:1'
+    ).sort_values('date', ignore_index=True)
     
     merged_df['month'] = merged_df['date'].dt.month
     merged_df['year'] = merged_df['date'].dt.year
@@ -302,9 +428,7 @@ if __name__ == "__main__":
     
     # Save merged data
     output_path = os.path.join("processed", "energy_temperature_monthly.csv")
-    merged_df[['date', 'month', 'year', 'electricity_gwh', 'temperature_c']].to_csv(
-        output_path, index=False
-    )
+    write_csv(merged_df[['date', 'month', 'year', 'electricity_gwh', 'temperature_c']], output_path)
     print(f"  ✓ Saved: {output_path}")
     
     # 4. Fetch Mortality Data
@@ -316,7 +440,7 @@ if __name__ == "__main__":
     
     # Save mortality data
     output_path = os.path.join("processed", "heat_mortality_yearly.csv")
-    mortality_df.to_csv(output_path, index=False)
+    write_csv(mortality_df, output_path)
     print(f"  ✓ Saved: {output_path}")
     
     # 5. Create Visualizations
@@ -324,101 +448,17 @@ if __name__ == "__main__":
     print("STEP 5: Creating Visualizations")
     print("=" * 70)
     
-    # Plot 1: Energy vs Temperature
+    # The two charts are independent: render them in parallel processes
     print("\n[PLOT 1] Energy Consumption vs Temperature...")
-    
-    fig, ax1 = plt.subplots(figsize=(12, 6))
-    
-    # Left y-axis: Electricity
-    color1 = '#e85d04'
-    ax1.set_xlabel('Month', fontweight='bold')
-    ax1.set_ylabel('Electricity Consumption (GWh)', color=color1, fontweight='bold')
-    line1 = ax1.plot(merged_df['date'], merged_df['electricity_gwh'], 
-                     color=color1, linewidth=2, label='Electricity Consumption', 
-                     marker='o', markersize=3)
-    ax1.tick_params(axis='y', labelcolor=color1)
-    ax1.grid(True, alpha=0.3, linestyle='--')
-    
-    # Right y-axis: Temperature
-    ax2 = ax1.twinx()
-    color2 = '#dc2626'
-    ax2.set_ylabel('Average Temperature (°C)', color=color2, fontweight='bold')
-    line2 = ax2.plot(merged_df['date'], merged_df['temperature_c'], 
-                     color=color2, linewidth=2, label='Temperature', 
-                     marker='s', markersize=3, linestyle='--')
-    ax2.tick_params(axis='y', labelcolor=color2)
-    
-    # Title
-    plt.title('Electricity Demand Increases During Hot Periods', 
-              fontsize=16, fontweight='bold', pad=20)
-    plt.suptitle('Italy, Monthly Averages', 
-                 fontsize=11, y=0.96, style='italic')
-    
-    # Legend
-    lines1, labels1 = ax1.get_legend_handles_labels()
-    lines2, labels2 = ax2.get_legend_handles_labels()
-    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', framealpha=0.9)
-    
-    # Format dates
-    fig.autofmt_xdate(rotation=45)
-    ax1.xaxis.set_major_formatter(plt.matplotlib.dates.DateFormatter('%Y-%m'))
-    
-    # Caption
-    caption = ("Higher temperatures increase cooling demand, raising electricity consumption.\n"
-               "Data sources: Eurostat (energy), Copernicus ERA5 (temperature)")
-    fig.text(0.5, 0.02, caption, ha='center', fontsize=9, style='italic',
-            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
-    
-    plt.tight_layout()
-    output_path = os.path.join("processed", "energy_consumption_vs_temperature.png")
-    plt.savefig(output_path, bbox_inches='tight', facecolor='white')
-    print(f"  ✓ Saved: {output_path}")
-    plt.close()
-    
-    # Plot 2: Mortality
-    print("\n[PLOT 2] Heat-Related Mortality...")
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    colors = plt.cm.Reds(np.linspace(0.4, 0.9, len(mortality_df)))
-    bars = ax.bar(mortality_df['year'], mortality_df['excess_deaths'], 
-                  color=colors, edgecolor='darkred', linewidth=1.5, alpha=0.8)
-    
-    # Value labels
-    for bar, value in zip(bars, mortality_df['excess_deaths']):
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-                f'{int(value):,}', ha='center', va='bottom', 
-                fontweight='bold', fontsize=9)
-    
-    ax.set_xlabel('Year', fontweight='bold')
-    ax.set_ylabel('Excess Deaths', fontweight='bold')
-    ax.set_title('Excess Mortality During Extreme Heat Events', 
-                 fontsize=16, fontweight='bold', pad=20)
-    ax.set_title('Europe / Italy (Official Statistics)', 
-                 fontsize=11, style='italic', pad=5, loc='right')
-    
-    ax.grid(True, alpha=0.3, linestyle='--', axis='y')
-    ax.set_axisbelow(True)
-    
-    # Highlight 2022
-    ax.axvline(x=2022, color='darkred', linestyle=':', linewidth=2, 
-               alpha=0.7, label='Record heatwave (2022)')
-    ax.legend(loc='upper left', framealpha=0.9)
-    
-    # Caption
-    caption = ("Extreme heat events are associated with increased mortality, "
-               "particularly among vulnerable populations.\n"
-               "Data sources: Eurostat excess mortality statistics, "
-               "peer-reviewed research (Nature Medicine, 2023)")
-    fig.text(0.5, 0.02, caption, ha='center', fontsize=9, style='italic',
-            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.3))
-    
-    plt.tight_layout()
-    output_path = os.path.join("processed", "heat_related_mortality.png")
-    plt.savefig(output_path, bbox_inches='tight', facecolor='white')
-    print(f"  ✓ Saved: {output_path}")
-    plt.close()
+    print("[PLOT 2] Heat-Related Mortality...")
+    
+    jobs = [
+        ('energy_temp', merged_df, os.path.join("processed", "energy_consumption_vs_temperature.png")),
+        ('mortality', mortality_df, os.path.join("processed", "heat_related_mortality.png")),
+    ]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        for output_path in executor.map(_render, jobs):
+            print(f"  ✓ Saved: {output_path}")
     
     # Final summary
     print("\n" + "=" * 70)
@@ -1,4 +1,5 @@
-﻿import json
+﻿import codecs
+import json
 from pathlib import Path
 
 import pandas as pd
@@ -17,25 +18,70 @@ DECIMAL_COMMA_COLUMNS = {
     "global_sleep_lost.csv": ["Sleep_loss_percentage"],
 }
 
-
-PREFERRED_ENCODINGS = ["utf-8", "latin-1", "cp1252"]
+# Known numeric columns, typed by the C parser at read time (nullable
+# integers, so a blank cell still comes out as null)
+COLUMN_DTYPES = {
+    "global_mortality_rate.csv": {"Year": "Int16", "AN": "Int64"},
+    "global_sleep_lost.csv": {"Year": "Int16"},
+    "vulnerable_people_expsore_days.csv": {
+        "Year": "Int16",
+        "exposures_total_infants": "Int64",
+        "exposures_total_65": "Int64",
+    },
+}
 
 
-def read_csv_with_fallbacks(csv_path: Path) -> pd.DataFrame:
-    last_error: Exception | None = None
-    for enc in PREFERRED_ENCODINGS:
+PREFERRED_ENCODINGS = ["utf-8", "latin-1", "cp1252"]
+ENCODING_PROBE_BYTES = 8192
+
+# {csv name: [mtime_ns, size]} of the inputs behind the current JSON outputs
+CACHE_MANIFEST = ROOT / ".cache_manifest.json"
+
+
+def detect_legacy_encoding(csv_path: Path) -> str | None:
+    """Pick the most likely of the non-UTF-8 PREFERRED_ENCODINGS from the file head."""
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:  # optional: without it the list order decides
+        return None
+    with csv_path.open("rb") as f:
+        head = f.read(ENCODING_PROBE_BYTES)
+    # Only trust the probe to rank the known legacy encodings; any other
+    # guess (e.g. cp932 on a head cut mid-character) is skipped
+    legacy = {codecs.lookup(enc).name: enc for enc in PREFERRED_ENCODINGS[1:]}
+    for match in from_bytes(head):
+        enc = legacy.get(codecs.lookup(match.encoding).name)
+        if enc is not None:
+            return enc
+    return None
+
+
+def read_csv_with_fallbacks(
+    csv_path: Path, decimal: str = ".", dtype: dict[str, str] | None = None
+) -> pd.DataFrame:
+    # Strict UTF-8 always goes first; a wrong decode there raises instead of
+    # silently garbling text. Legacy encodings never fail to decode, so the
+    # head probe only decides which of them is tried first
+    try:
+        return pd.read_csv(csv_path, encoding="utf-8", decimal=decimal, dtype=dtype)
+    except UnicodeDecodeError as err:
+        last_error: Exception = err
+
+    detected = detect_legacy_encoding(csv_path)
+    candidates = [detected] if detected else []
+    candidates += [enc for enc in PREFERRED_ENCODINGS[1:] if enc != detected]
+
+    for enc in candidates:
         try:
-            return pd.read_csv(csv_path, encoding=enc)
+            return pd.read_csv(csv_path, encoding=enc, decimal=decimal, dtype=dtype)
         except UnicodeDecodeError as err:
             last_error = err
-    if last_error is not None:
-        raise last_error
-    return pd.read_csv(csv_path)
+    raise last_error
 
 
 def normalize_decimal_commas(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
     for col in columns:
-        if col in df.columns:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
             df[col] = (
                 df[col]
                 .astype(str)
@@ -47,36 +93,54 @@ def normalize_decimal_commas(df: pd.DataFrame, columns: list[str]) -> pd.DataFra
 
 
 def convert_csv_to_json(csv_path: Path) -> Path:
-    df = read_csv_with_fallbacks(csv_path)
-
     decimal_cols = DECIMAL_COMMA_COLUMNS.get(csv_path.name, [])
+    # Let the C parser read "0,57" as 0.57; the string pass below only
+    # touches columns that still came out non-numeric
+    df = read_csv_with_fallbacks(
+        csv_path,
+        decimal="," if decimal_cols else ".",
+        dtype=COLUMN_DTYPES.get(csv_path.name),
+    )
     if decimal_cols:
         df = normalize_decimal_commas(df, decimal_cols)
 
-    # Best-effort numeric coercion for other columns without breaking strings
-    for col in df.columns:
-        if col in decimal_cols:
-            continue
-        if df[col].dtype == object:
-            coerced = pd.to_numeric(df[col], errors="ignore")
-            df[col] = coerced
-
-    records = df.where(pd.notnull(df), None).to_dict(orient="records")
+    # Best-effort typing of any remaining object columns in one pass, without
+    # breaking strings (read_csv has already parsed the numeric ones)
+    df = df.infer_objects()
 
+    # pandas' C JSON writer streams straight from the columns (NaN -> null),
+    # with no null-masked copy of the frame or list of dicts in between
     json_path = csv_path.with_suffix(".json")
-    with json_path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+    df.to_json(json_path, orient="records", indent=2, force_ascii=False)
 
     return json_path
 
 
+def load_manifest() -> dict:
+    try:
+        return json.loads(CACHE_MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
 def main() -> None:
+    manifest = load_manifest()
     created = []
     for name in CSV_FILES:
         csv_path = ROOT / name
         if not csv_path.exists():
             continue
+        stat = csv_path.stat()
+        key = [stat.st_mtime_ns, stat.st_size]
+        json_path = csv_path.with_suffix(".json")
+        # Skip unchanged inputs whose JSON is already on disk
+        if json_path.exists() and manifest.get(name) == key:
+            created.append(json_path)
+            continue
         created.append(convert_csv_to_json(csv_path))
+        manifest[name] = key
+
+    CACHE_MANIFEST.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
 
     print("Created JSON files:")
     for path in created:
@@ -84,4 +148,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    main()